@@ -1,10 +1,13 @@
-import requests
-from urllib.parse import urlencode
-import csv
-import json
-import matplotlib.pyplot as plt
-import pandas as pd
-from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import math
+from dataclasses import dataclass
+from operator import attrgetter
+import aiohttp
+from aiohttp_client_cache import CachedSession, SQLiteBackend
+import numpy as np
+import orjson
+import os
+import sys
 
 class APIError(Exception):
     """Exception raised for errors in the API response."""
@@ -20,119 +23,315 @@ class ValidationError(Exception):
         super().__init__(self.message)
 
 
-def build_url(base_url, endpoint, params=None):
-    """Builds a complete URL with optional query parameters."""
-    url = f"{base_url}{endpoint}"
-    if params:
-        query_string = urlencode(params)
-        url = f"{url}?{query_string}"
-    return url
+@dataclass(slots=True)
+class UserRecord:
+    """Profile data fetched for a single user."""
+    username: str
+    rating: int | str = "N/A"
+    solved: int | str = "N/A"
+    badges: str = "N/A"
+    ranking: int | str = "N/A"
+
+    def as_row(self):
+        """Returns the record keyed by the column names used for output."""
+        return {
+            "Username": self.username,
+            "Rating": self.rating,
+            "Problems Solved": self.solved,
+            "Badges": self.badges,
+            "Ranking": self.ranking
+        }
+
+
+def build_url(base_url, endpoint):
+    """Builds a complete URL from the base URL and endpoint."""
+    return f"{base_url}{endpoint}"
+
+
+def canonical_username(username):
+    """Returns the form of a username used for URLs, cache keys and deduplication."""
+    # LeetCode treats usernames case-insensitively; one form means one cache entry
+    return username.strip().lower()
 
 
 def validate_username(username):
-    """Validates the username input."""
-    if not username or not isinstance(username, str):
+    """Validates the username input and returns its canonical form."""
+    if not isinstance(username, str) or not username.strip():
         raise ValidationError("Username must be a non-empty string")
+    return canonical_username(username)
 
 
 class LeetcodeWrapper:
     """A Python wrapper for the Alfa LeetCode API."""
     BASE_URL = "https://alfa-leetcode-api.onrender.com"
+    USER_AGENT = "leetcodeprofileextractor"
+    CACHE_NAME = "leetcode_cache"
+    CACHE_EXPIRE_AFTER = 3600
+    MAX_RETRIES = 3
+    BACKOFF_FACTOR = 0.5
+    MAX_RETRY_DELAY = 10
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+    # Users fetched at once, and the endpoint calls each of them makes in parallel
+    MAX_CONCURRENT_USERS = 16
+    REQUESTS_PER_USER = 3
+    _session = None
 
     def __init__(self, username):
         """Initializes the LeetcodeWrapper instance with the provided username."""
-        validate_username(username)
-        self.username = username
-
-    def _request(self, endpoint, params=None):
-        """Sends a GET request to the specified API endpoint."""
-        url = build_url(self.BASE_URL, endpoint, params)
+        # URLs and cache keys use the canonical form; username keeps what was entered
+        canonical = validate_username(username)
+        self.username = username.strip()
+        # Endpoint URLs are fixed per user, so build them once up front
+        self._profile_url = build_url(self.BASE_URL, f"/{canonical}")
+        self._badges_url = f"{self._profile_url}/badges"
+        self._solved_url = f"{self._profile_url}/solved"
+
+    @classmethod
+    def get_session(cls):
+        """Returns the session shared by all instances, creating it on first use."""
+        if cls._session is None or cls._session.closed:
+            cls._session = CachedSession(
+                cache=SQLiteBackend(
+                    cls.CACHE_NAME, expire_after=cls.CACHE_EXPIRE_AFTER, allowed_codes=(200,), allowed_methods=("GET",)
+                ),
+                connector=aiohttp.TCPConnector(
+                    limit=100, limit_per_host=cls.MAX_CONCURRENT_USERS * cls.REQUESTS_PER_USER
+                ),
+                timeout=aiohttp.ClientTimeout(total=10),
+                headers={"User-Agent": cls.USER_AGENT},
+            )
+        return cls._session
+
+    @classmethod
+    async def warm_up(cls, usernames):
+        """Resolves the API host and opens a connection to it, unless every user's data is cached."""
+        session = cls.get_session()
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as http_err:
-            raise APIError(f"HTTP error occurred: {http_err}")
-        except requests.exceptions.RequestException as req_err:
-            raise APIError(f"Request error occurred: {req_err}")
+            for username in usernames:
+                try:
+                    api = cls(username)
+                except ValidationError:
+                    continue
+                urls = (api._profile_url, api._badges_url, api._solved_url)
+                if not all([await session.cache.has_url(url) for url in urls]):
+                    break
+            else:
+                return
+            async with session.head(cls.BASE_URL, timeout=aiohttp.ClientTimeout(total=5)):
+                pass
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+
+    @classmethod
+    async def close_session(cls):
+        """Closes the shared session if it is open."""
+        if cls._session is not None and not cls._session.closed:
+            await cls._session.close()
+        cls._session = None
+
+    async def _request(self, url, params=None):
+        """Sends a GET request to the specified API URL."""
+        for attempt in range(self.MAX_RETRIES + 1):
+            retry_after = None
+            try:
+                async with self.get_session().get(url, params=params) as response:
+                    if response.status in self.RETRY_STATUSES and attempt < self.MAX_RETRIES:
+                        retry_after = response.headers.get("Retry-After")
+                    else:
+                        response.raise_for_status()
+                        try:
+                            return orjson.loads(await response.read())
+                        except orjson.JSONDecodeError:
+                            raise APIError("Failed to parse JSON response")
+            except aiohttp.ClientResponseError as http_err:
+                raise APIError(f"HTTP error occurred: {http_err}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as req_err:
+                if attempt == self.MAX_RETRIES:
+                    raise APIError(f"Request error occurred: {req_err}")
+            await asyncio.sleep(self._retry_delay(attempt, retry_after))
+
+    def _retry_delay(self, attempt, retry_after=None):
+        """Returns how long to wait before the next attempt, honouring a Retry-After header."""
         try:
-            return response.json()
-        except json.JSONDecodeError:
-            raise APIError("Failed to parse JSON response")
-
-    def get_profile(self):
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = math.nan
+        if not math.isfinite(delay) or delay < 0:
+            delay = self.BACKOFF_FACTOR * 2 ** attempt
+        return min(delay, self.MAX_RETRY_DELAY)
+
+    async def get_profile(self):
         """Fetches the user's profile details."""
-        return self._request(f"/{self.username}")
+        return await self._request(self._profile_url)
 
-    def get_badges(self):
+    async def get_badges(self):
         """Fetches the badges earned by the user."""
-        return self._request(f"/{self.username}/badges")
+        return await self._request(self._badges_url)
 
-    def get_solved(self):
+    async def get_solved(self):
         """Fetches the total number of problems solved by the user."""
-        return self._request(f"/{self.username}/solved")
+        return await self._request(self._solved_url)
 
 
-def fetch_user_data(username):
+async def fetch_user_data(username):
     """Fetch user data using the Leetcode API wrapper."""
     api = LeetcodeWrapper(username)
     try:
-        profile = api.get_profile()
-        badges = api.get_badges()
-        solved_problems = api.get_solved()
-
-        user_data = {
-            "Username": username,
-            "Rating": profile.get("reputation", "N/A"),
-            "Problems Solved": solved_problems.get("solvedProblem", "N/A"),
-            "Badges": "N/A",
-            "Ranking": profile.get("ranking", "N/A")
-        }
-
-        if badges and isinstance(badges.get("badges"), list):
-            badge_names = [badge.get('displayName', 'N/A') for badge in badges.get("badges", [])]
-            user_data["Badges"] = ", ".join(badge_names)
+        # Run the three endpoint calls at once; if one fails, cancel the others
+        # rather than leaving them in flight.
+        calls = [asyncio.ensure_future(call) for call in (api.get_profile(), api.get_badges(), api.get_solved())]
+        try:
+            profile, badges, solved_problems = await asyncio.gather(*calls)
+        except BaseException:
+            for call in calls:
+                call.cancel()
+            raise
+
+        user_data = UserRecord(
+            username=api.username,
+            rating=profile.get("reputation", "N/A"),
+            solved=solved_problems.get("solvedProblem", "N/A"),
+            ranking=profile.get("ranking", "N/A")
+        )
+
+        badge_list = badges.get("badges") if isinstance(badges, dict) else None
+        if isinstance(badge_list, list):
+            user_data.badges = ", ".join([badge.get('displayName', 'N/A') for badge in badge_list])
 
         return user_data
     except APIError as e:
         raise APIError(f"Failed to fetch data for {username}: {e}")
 
 
-def rank_users(data):
-    """Ranks users by rating and problems solved."""
-    sorted_by_rating = sorted(data, key=lambda x: x.get("Rating", 0), reverse=True)
-    sorted_by_solved = sorted(data, key=lambda x: x.get("Problems Solved", 0), reverse=True)
-    return sorted_by_rating, sorted_by_solved
+async def fetch_all(usernames, max_concurrency=LeetcodeWrapper.MAX_CONCURRENT_USERS):
+    """Fetches data for all usernames concurrently, returning results in input order.
+
+    Errors are reported as soon as each fetch fails.
+    """
+    # Cap how many users are fetched at once so the API isn't flooded
+    slots = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(username):
+        try:
+            async with slots:
+                return username, await fetch_user_data(username)
+        except (APIError, ValidationError) as e:
+            return username, e
+
+    tasks = []
+    # Warm up alongside the fetches so a slow or cached-only run never waits on it
+    warm_up = asyncio.ensure_future(LeetcodeWrapper.warm_up(usernames))
+    try:
+        tasks = [asyncio.ensure_future(fetch(username)) for username in usernames]
+        for next_done in asyncio.as_completed(tasks):
+            username, outcome = await next_done
+            if isinstance(outcome, APIError):
+                print(f"Error fetching data for {username}: {outcome}")
+            elif isinstance(outcome, ValidationError):
+                print(f"Validation error for {username}: {outcome}")
+    finally:
+        warm_up.cancel()
+        for task in tasks:
+            task.cancel()
+        await LeetcodeWrapper.close_session()
+    outcomes = (task.result()[1] for task in tasks)
+    return [outcome for outcome in outcomes if not isinstance(outcome, (APIError, ValidationError))]
+
+
+def to_numeric(data, field):
+    """Returns the values of a field as a float array, with non-numeric values as NaN."""
+    def coerce(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+    return np.fromiter(map(coerce, map(attrgetter(field), data)), dtype=np.float64, count=len(data))
+
+
+def top_users(data, field, count):
+    """Returns the users with the highest values of a field, best first."""
+    # Lower scores rank first; non-numeric values rank last
+    values = to_numeric(data, field)
+    scores = np.where(np.isnan(values), np.inf, -values)
+    if len(scores) > count:
+        # Find the cut-off score in linear time, then keep everything better than it
+        # and fill the remaining places with the earliest users tying with it
+        cutoff = np.partition(scores, count - 1)[count - 1]
+        better = np.flatnonzero(scores < cutoff)
+        tied = np.flatnonzero(scores == cutoff)[:count - len(better)]
+        indices = np.sort(np.concatenate((better, tied)))
+    else:
+        indices = np.arange(len(scores))
+    # Indices are in input order, so the stable sort keeps ties in input order
+    indices = indices[np.argsort(scores[indices], kind="stable")]
+    return [data[i] for i in indices]
+
+
+def rank_users(data, count=5):
+    """Returns the top users by rating and by problems solved."""
+    return top_users(data, "rating", count), top_users(data, "solved", count)
+
+
+# matplotlib backends that render to files only and cannot open a window
+NON_INTERACTIVE_BACKENDS = frozenset({"agg", "cairo", "pdf", "pgf", "ps", "svg", "template"})
 
 
-def visualize_data(data):
-    """Creates a bar chart to visualize the distribution of ratings, problems solved, etc."""
-    df = pd.DataFrame(data)
+def has_display():
+    """Returns whether a graphical display is available to show charts on."""
+    if os.name == "posix" and sys.platform != "darwin":
+        return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+    return True
+
+
+def visualize_data(data, interactive=None, output="leetcode.png"):
+    """Creates a bar chart to visualize the distribution of ratings, problems solved, etc.
+
+    The chart is shown in a window when interactive, otherwise it is saved to output.
+    Interactive mode defaults to whether a display is available.
+    """
+    if interactive is None:
+        interactive = has_display()
+    # Imported here so runs that skip the chart don't pay for loading matplotlib
+    import matplotlib
+    if not interactive:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    # matplotlib may still settle on a file-only backend, where show() would do nothing
+    if matplotlib.get_backend().lower() in NON_INTERACTIVE_BACKENDS:
+        interactive = False
+
     # Convert columns to numeric, where possible, and drop any rows with 'N/A' or invalid values
-    df["Rating"] = pd.to_numeric(df["Rating"], errors="coerce")
-    df["Problems Solved"] = pd.to_numeric(df["Problems Solved"], errors="coerce")
-    df = df.dropna(subset=["Rating", "Problems Solved"])
+    ratings = to_numeric(data, "rating")
+    solved = to_numeric(data, "solved")
+    valid = np.flatnonzero(np.isfinite(ratings) & np.isfinite(solved))
 
     # Sort by Rating for visualization purposes
-    df = df.sort_values(by="Rating", ascending=False)
+    order = valid[np.argsort(-ratings[valid], kind="stable")]
+    usernames = [data[i].username for i in order]
 
     # Creating a plot with multiple metrics
     fig, ax = plt.subplots(figsize=(14, 8), facecolor='#f7f7f9')
     bar_width = 0.25
-    index = range(len(df))
+    index = np.arange(len(order))
 
     # Plotting Rating, Problems Solved, and Ranking
-    ax.bar(index, df["Rating"], bar_width, label="Rating", color='#76c7c0', edgecolor='#034752', linewidth=1.5)
-    ax.bar([i + bar_width for i in index], df["Problems Solved"], bar_width, label="Problems Solved", color='#f7a800', edgecolor='#034752', linewidth=1.5)
+    ax.bar(index, ratings[order], bar_width, label="Rating", color='#76c7c0', edgecolor='#034752', linewidth=1.5)
+    ax.bar(index + bar_width, solved[order], bar_width, label="Problems Solved", color='#f7a800', edgecolor='#034752', linewidth=1.5)
 
     ax.set_xlabel("Users", fontsize=12, fontweight='bold')
     ax.set_ylabel("Scores", fontsize=12, fontweight='bold')
     ax.set_title("LeetCode User Performance", fontsize=16, fontweight='bold', color='#034752')
-    ax.set_xticks([i + bar_width / 2 for i in index])
-    ax.set_xticklabels(df["Username"], rotation=45, ha="right", fontsize=10, color='#333333')
+    ax.set_xticks(index + bar_width / 2)
+    ax.set_xticklabels(usernames, rotation=45, ha="right", fontsize=10, color='#333333')
     ax.legend()
 
     plt.tight_layout()
-    plt.show()
+    if interactive:
+        plt.show()
+    else:
+        fig.savefig(output, dpi=120, bbox_inches="tight")
+        plt.close(fig)
+        print(f"Chart saved to '{output}'.")
 
 
 def main():
@@ -146,7 +345,7 @@ def main():
         file_path = input("Enter the file path: ").strip()
         try:
             with open(file_path, 'r') as file:
-                usernames = [line.strip() for line in file.readlines() if line.strip()]
+                usernames = [name for name in (line.strip() for line in file) if name]
         except FileNotFoundError:
             print("File not found. Please check the file path and try again.")
             return
@@ -154,34 +353,31 @@ def main():
         print("Invalid choice. Exiting.")
         return
 
+    # Drop repeated usernames, keeping the first spelling entered for each
+    unique_usernames = {}
+    for username in usernames:
+        unique_usernames.setdefault(canonical_username(username), username)
+    usernames = list(unique_usernames.values())
+
     print("\nFetching data for usernames...")
-    results = []
-    with ThreadPoolExecutor() as executor:
-        futures = {executor.submit(fetch_user_data, username): username for username in usernames}
-        for future in futures:
-            try:
-                results.append(future.result())
-            except APIError as e:
-                print(f"Error fetching data for {futures[future]}: {e}")
-            except ValidationError as e:
-                print(f"Validation error for {futures[future]}: {e}")
+    results = asyncio.run(fetch_all(usernames))
 
     print("\nRetrieved Data:")
     for user_data in results:
-        print(f"Username: {user_data['Username']}")
-        print(f"Rating: {user_data['Rating']}")
-        print(f"Problems Solved: {user_data['Problems Solved']}")
-        print(f"Badges: {user_data['Badges']}")
-        print(f"Ranking: {user_data['Ranking']}\n")
+        print(f"Username: {user_data.username}")
+        print(f"Rating: {user_data.rating}")
+        print(f"Problems Solved: {user_data.solved}")
+        print(f"Badges: {user_data.badges}")
+        print(f"Ranking: {user_data.ranking}\n")
 
     print("\nRanking users by performance...")
     ranked_by_rating, ranked_by_solved = rank_users(results)
     print("Top Users by Rating:")
-    for user in ranked_by_rating[:5]:
-        print(f"{user['Username']} - Rating: {user['Rating']}")
+    for user in ranked_by_rating:
+        print(f"{user.username} - Rating: {user.rating}")
     print("\nTop Users by Problems Solved:")
-    for user in ranked_by_solved[:5]:
-        print(f"{user['Username']} - Problems Solved: {user['Problems Solved']}")
+    for user in ranked_by_solved:
+        print(f"{user.username} - Problems Solved: {user.solved}")
 
     visualize_choice = input("\nDo you want to visualize the data? (yes/no): ").strip().lower()
     if visualize_choice == "yes":
@@ -193,14 +389,16 @@ def main():
         file_format = input("Enter file format (csv/json): ").strip().lower()
 
         if file_format == "csv":
-            with open(f'{file_name}.csv', 'w', newline='') as file:
+            import csv
+            with open(f'{file_name}.csv', 'w', newline='', buffering=1 << 20) as file:
                 writer = csv.DictWriter(file, fieldnames=["Username", "Rating", "Problems Solved", "Badges", "Ranking"])
                 writer.writeheader()
-                writer.writerows(results)
+                writer.writerows(user_data.as_row() for user_data in results)
             print(f"Data saved to '{file_name}.csv'.")
         elif file_format == "json":
-            with open(f'{file_name}.json', 'w') as file:
-                json.dump(results, file, indent=4)
+            with open(f'{file_name}.json', 'wb') as file:
+                # orjson writes non-ASCII characters as raw UTF-8 rather than \u escapes
+                file.write(orjson.dumps([user_data.as_row() for user_data in results], option=orjson.OPT_INDENT_2))
             print(f"Data saved to '{file_name}.json'.")
         else:
             print("Invalid format. No file saved.")
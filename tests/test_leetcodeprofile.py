@@ -0,0 +1,51 @@
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "leetcodeprofiletracker"))
+
+import leetcodeprofile
+from leetcodeprofile import UserRecord, has_display, rank_users, top_users
+
+
+def make_users(ratings):
+    return [UserRecord(username=name, rating=rating) for name, rating in ratings]
+
+
+def test_top_users_keeps_input_order_for_ties():
+    users = make_users([
+        ("Bob", 30), ("alice", 50), ("na", "N/A"), ("carol", 50), ("d", 10), ("e", 10), ("f", 10),
+    ])
+    top = top_users(users, "rating", 5)
+    assert [user.username for user in top] == ["alice", "carol", "Bob", "d", "e"]
+
+
+def test_top_users_ranks_non_numeric_values_last():
+    users = make_users([("na", "N/A"), ("a", 1), ("none", None), ("b", 2)])
+    top = top_users(users, "rating", 3)
+    assert [user.username for user in top] == ["b", "a", "na"]
+
+
+def test_top_users_matches_sorted_on_ties():
+    rng = random.Random(0)
+    for _ in range(200):
+        users = make_users((str(i), rng.randint(0, 3)) for i in range(rng.randint(0, 12)))
+        expected = sorted(users, key=lambda user: user.rating, reverse=True)[:5]
+        assert top_users(users, "rating", 5) == expected
+
+
+def test_rank_users_returns_top_count_for_each_metric():
+    users = [UserRecord(username=str(i), rating=i, solved=10 - i) for i in range(8)]
+    by_rating, by_solved = rank_users(users, count=2)
+    assert [user.username for user in by_rating] == ["7", "6"]
+    assert [user.username for user in by_solved] == ["0", "1"]
+
+
+def test_has_display_requires_display_variable_on_linux(monkeypatch):
+    monkeypatch.setattr(leetcodeprofile.os, "name", "posix")
+    monkeypatch.setattr(leetcodeprofile.sys, "platform", "linux")
+    monkeypatch.delenv("DISPLAY", raising=False)
+    monkeypatch.delenv("WAYLAND_DISPLAY", raising=False)
+    assert not has_display()
+    monkeypatch.setenv("WAYLAND_DISPLAY", "wayland-0")
+    assert has_display()